@@ -6,13 +6,104 @@ import os
 import urllib.parse
 import sys
 import time
+import json
+import argparse
+import threading
+
+from src.lbo_modeling.lbo_model import ScenarioCache, run_scenario
 
 PORT = 8000
 
+# Memoized LBO scenarios shared by all requests to /api/lbo
+scenario_cache = ScenarioCache()
+
+# In watch mode, analyses are kept up to date by the filings watcher instead
+# of re-running the whole pipeline on each request
+watch_mode = False
+published_results = {}
+published_results_lock = threading.Lock()
+
+def publish_result(company_name, published_at):
+    """Record an analysis published by the filings watcher."""
+    with published_results_lock:
+        published_results[company_name] = {
+            "published_at": published_at,
+            "path": f"output/{company_name}_lbo_analysis.txt",
+        }
+    print(f"✓ Published updated analysis for {company_name}")
+
 class AnalysisHandler(http.server.SimpleHTTPRequestHandler):
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_lbo_scenario(self, params):
+        """
+        Compute an LBO scenario locally from financial_metrics.
+
+        Expects a "company" parameter; every other parameter overrides one of
+        the assumptions in lbo_model.DEFAULT_ASSUMPTIONS.
+        """
+        params = dict(params)
+        company = params.pop('company', None)
+        if not company:
+            self.send_json(400, {"error": "Missing required parameter: company"})
+            return
+
+        start = time.perf_counter()
+        try:
+            result, cached = run_scenario(company, params, scenario_cache)
+        except LookupError as e:
+            self.send_json(404, {"error": str(e)})
+            return
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": f"Error computing scenario: {str(e)}"})
+            return
+
+        self.send_json(200, {
+            **result,
+            "cached": cached,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+        })
+
+    def do_POST(self):
+        # Scenario requests with assumptions in a JSON body
+        if urllib.parse.urlparse(self.path).path == '/api/lbo':
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                params = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(params, dict):
+                    raise ValueError("Request body must be a JSON object")
+            except ValueError as e:
+                self.send_json(400, {"error": f"Invalid JSON body: {str(e)}"})
+                return
+            self.handle_lbo_scenario(params)
+        else:
+            self.send_error(404)
+
     def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+
+        # Scenario requests with assumptions in the query string
+        if parsed.path == '/api/lbo':
+            params = dict(urllib.parse.parse_qsl(parsed.query))
+            self.handle_lbo_scenario(params)
+
+        # Analyses published by the filings watcher since the server started
+        elif parsed.path == '/api/updates':
+            with published_results_lock:
+                updates = dict(published_results)
+            self.send_json(200, {"watch_mode": watch_mode, "published": updates})
+
         # Serve the index.html file
-        if self.path == '/' or self.path == '/index.html':
+        elif self.path == '/' or self.path == '/index.html':
             self.path = '/index.html'
             return http.server.SimpleHTTPRequestHandler.do_GET(self)
         
@@ -23,17 +114,18 @@ class AnalysisHandler(http.server.SimpleHTTPRequestHandler):
             self.end_headers()
             
             try:
-                # Create a devnull file object to suppress output
-                with open(os.devnull, 'w') as devnull:
-                    # Run the data extraction script with all output suppressed
-                    subprocess.run(
-                        [sys.executable, 'src/document_processing/data_extraction.py'],
-                        stdout=devnull,
-                        stderr=devnull
-                    )
-                
-                # Give it a moment to ensure file writing is complete
-                time.sleep(2)
+                if not watch_mode:
+                    # Create a devnull file object to suppress output
+                    with open(os.devnull, 'w') as devnull:
+                        # Run the data extraction script with all output suppressed
+                        subprocess.run(
+                            [sys.executable, 'src/document_processing/data_extraction.py'],
+                            stdout=devnull,
+                            stderr=devnull
+                        )
+                    
+                    # Give it a moment to ensure file writing is complete
+                    time.sleep(2)
                 
                 # Read and return only the final LBO analysis
                 lbo_output_path = 'output/YETI_lbo_analysis.txt'
@@ -52,16 +144,35 @@ class AnalysisHandler(http.server.SimpleHTTPRequestHandler):
             return http.server.SimpleHTTPRequestHandler.do_GET(self)
 
 def main():
+    global watch_mode
+    
+    parser = argparse.ArgumentParser(description="YETI LBO analysis web server")
+    parser.add_argument('--watch', action='store_true',
+                        help='Watch data/sec_filings and re-analyze companies as new filings land')
+    args = parser.parse_args()
+    
     # Create the server
     handler = AnalysisHandler
     httpd = socketserver.TCPServer(("", PORT), handler)
     
+    stop_event = threading.Event()
+    if args.watch:
+        from src.document_processing.watch_filings import watch
+        watch_mode = True
+        watcher = threading.Thread(
+            target=watch,
+            kwargs={"on_publish": publish_result, "stop_event": stop_event},
+            daemon=True
+        )
+        watcher.start()
+    
     print(f"Server running at http://localhost:{PORT}")
     print("Press Ctrl+C to stop")
     
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
+        stop_event.set()
         print("Server stopped")
         httpd.server_close()
 
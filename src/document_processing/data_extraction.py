@@ -1,5 +1,6 @@
 import anthropic
 import os
+import io
 import json
 import base64
 from pathlib import Path
@@ -8,11 +9,53 @@ from datetime import datetime
 import time
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pypdf import PdfReader, PdfWriter
+
+try:
+    from .hedged_requests import create_message, report_hedging
+    from .metric_values import parse_number
+except ImportError:
+    from hedged_requests import create_message, report_hedging
+    from metric_values import parse_number
 
 # Anthropic API details
 ANTHROPIC_API_KEY = "sk-ant-REDACTED"
 CLAUDE_SONNET35 = "claude-3-5-sonnet-20241022"
 CLAUDE_SONNET37 = "claude-3-7-sonnet-20250219"
+CLAUDE_HAIKU35 = "claude-3-5-haiku-20241022"
+
+# Model routing: try the fast model first and escalate to the large model
+# with extended thinking only when the fast result fails local validation
+ENABLE_MODEL_ROUTING = True
+FAST_EXTRACTION_MODEL = CLAUDE_HAIKU35
+ESCALATION_MODEL = CLAUDE_SONNET37
+
+# Revenue may move by at most this factor between adjacent quarters
+NEIGHBOUR_REVENUE_BAND = (0.5, 2.0)
+
+# Large-model latency used to estimate the time routing saves. Observed
+# escalation latencies are kept between runs; until there are any, the
+# configured baseline is used.
+ESCALATION_LATENCY_BASELINE = 120.0  # seconds
+ESCALATION_LATENCY_PATH = Path("output") / "escalation_latency.json"
+ESCALATION_LATENCY_HISTORY_SIZE = 50
+
+# Filings larger than a single document request allows are split into page chunks
+MAX_SINGLE_REQUEST_PAGES = 100
+MAX_SINGLE_REQUEST_BYTES = 24 * 1024 * 1024  # base64 adds ~33% on top of this
+PAGES_PER_CHUNK = 40
+MAX_CHUNK_WORKERS = 3
+
+# Sections and fields of the extraction JSON, in the order they are requested
+EXTRACTION_FIELDS = {
+    "Period_Info": ["Form_Type", "Year", "Quarter", "Filing_Date"],
+    "Income_Statement": ["Revenue", "EBITDA", "EBITDA_Margin"],
+    "Balance_Sheet": ["Cash", "Total_Debt", "Net_Debt", "Total_Assets", "Working_Capital"],
+    "Cash_Flow": ["CapEx", "CapEx_to_Revenue"],
+    "Growth_Metrics": ["Revenue_Growth", "EBITDA_Growth"],
+}
 
 def init_database():
     """Initialize SQLite database with required tables."""
@@ -53,12 +96,28 @@ def get_pdf_files(directory):
         pdf_files.append(pdf_file)
     return pdf_files
 
-def extract_form_10q_lbo_data(pdf_path, company_name):
+def extract_form_10q_lbo_data(pdf_path, company_name, model=CLAUDE_SONNET37, thinking=True):
     """Extract LBO data from a Form 10-Q PDF file."""
     # Read the PDF file
     with open(pdf_path, 'rb') as f:
         pdf_content = f.read()
     
+    return extract_pdf_bytes_lbo_data(pdf_content, company_name, model=model, thinking=thinking)
+
+def extract_pdf_bytes_lbo_data(pdf_content, company_name, page_range=None, model=CLAUDE_SONNET37, thinking=True):
+    """
+    Extract LBO data from in-memory PDF bytes.
+    
+    Parameters:
+    pdf_content (bytes): The PDF document, or a page range of it
+    company_name (str): Name of the company that filed the document
+    page_range (tuple): Optional (first_page, last_page) when pdf_content is an excerpt
+    model (str): Claude model to use
+    thinking (bool): Whether to enable extended thinking
+    
+    Returns:
+    str: The full output from Claude
+    """
     # Convert PDF to base64
     pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
     client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
@@ -76,32 +135,42 @@ def extract_form_10q_lbo_data(pdf_path, company_name):
         }
     })
 
+    if page_range:
+        document_note = (
+            f"pages {page_range[0]}-{page_range[1]} of an SEC filing (Form 10-Q or Form 10-K) of {company_name}. "
+            "This excerpt may not contain every financial statement; leave any metric that does not appear in these pages blank"
+        )
+    else:
+        document_note = f"an SEC filing (Form 10-Q or Form 10-K) of {company_name}"
+
     # Add the prompt text
     content.append({
         "type": "text",
         "text": f"""
-You have been provided with the Form 10-Q of {company_name}.
+You have been provided with {document_note}.
 
 <task>
-Your task is to extract key financial data from this Form 10-Q that would be necessary to build a simple Leveraged Buyout (LBO) model.
+Your task is to extract key financial data from this filing that would be necessary to build a simple Leveraged Buyout (LBO) model.
 
 PHASE 1: DOCUMENT ANALYSIS
-- Review the Form 10-Q to locate the key financial statements (Income Statement, Balance Sheet, Cash Flow Statement)
-- Identify the current quarter and year-to-date figures
-- Extract the reporting period information (Year and Quarter)
+- Identify whether the filing is a Form 10-Q (quarterly report) or a Form 10-K (annual report)
+- Review the filing to locate the key financial statements (Income Statement, Balance Sheet, Cash Flow Statement)
+- Identify the current quarter and year-to-date figures (for a Form 10-K, the full fiscal year figures)
+- Extract the reporting period information (Form Type, Year and Quarter)
 
 PHASE 2: EXTRACT THE FOLLOWING KEY METRICS
 <required_json_output>
 {{
 "Period_Info": {{
+  "Form_Type": "10-Q or 10-K",
   "Year": "Fiscal year of the report",
-  "Quarter": "Quarter number (1-4)",
+  "Quarter": "Quarter number (1-4); 4 for a Form 10-K",
   "Filing_Date": "Date of the filing"
 }},
 "Income_Statement": {{
-  "Revenue": "Total revenue/net sales for the most recent quarter in millions USD",
-  "EBITDA": "EBITDA for the most recent quarter in millions USD (calculate as Operating Income + Depreciation & Amortization if not directly stated)",
-  "EBITDA_Margin": "EBITDA as a percentage of Revenue for the most recent quarter"
+  "Revenue": "Total revenue/net sales for the most recent quarter (full fiscal year for a Form 10-K) in millions USD",
+  "EBITDA": "EBITDA for the most recent quarter (full fiscal year for a Form 10-K) in millions USD (calculate as Operating Income + Depreciation & Amortization if not directly stated)",
+  "EBITDA_Margin": "EBITDA as a percentage of Revenue for the same period"
 }},
 "Balance_Sheet": {{
   "Cash": "Cash and cash equivalents in millions USD",
@@ -115,8 +184,8 @@ PHASE 2: EXTRACT THE FOLLOWING KEY METRICS
   "CapEx_to_Revenue": "CapEx as a percentage of revenue"
 }},
 "Growth_Metrics": {{
-  "Revenue_Growth": "Year-over-year revenue growth percentage for the most recent quarter",
-  "EBITDA_Growth": "Year-over-year EBITDA growth percentage for the most recent quarter"
+  "Revenue_Growth": "Year-over-year revenue growth percentage for the same period as Revenue",
+  "EBITDA_Growth": "Year-over-year EBITDA growth percentage for the same period as EBITDA"
 }}
 }}
 </required_json_output>
@@ -135,17 +204,23 @@ Only include metrics that are explicitly stated in the document or can be direct
         """
     })
 
-    message = client.messages.create(
-        model=CLAUDE_SONNET37,
-        max_tokens=8192,
-        thinking={
+    request_options = {}
+    if thinking:
+        request_options["thinking"] = {
             "type": "enabled",
             "budget_tokens": 4096
-        },
+        }
+
+    message = create_message(
+        client,
+        model,
+        model=model,
+        max_tokens=8192,
+        **request_options,
         system="""
-You are a financial analyst extracting key data for LBO modeling from Form 10-Q documents. Focus only on the essential metrics needed for a simple LBO model demonstration.
+You are a financial analyst extracting key data for LBO modeling from Form 10-Q and Form 10-K documents. Focus only on the essential metrics needed for a simple LBO model demonstration.
 
-Extract accurate financial data from the quarterly report, focusing specifically on:
+Extract accurate financial data from the report, focusing specifically on:
 1. Revenue and EBITDA figures
 2. Debt and cash positions
 3. Capital expenditures
@@ -184,6 +259,530 @@ def extract_json_from_output(output):
             return None
     return None
 
+def should_chunk_pdf(pdf_path):
+    """Check whether a PDF is too large to send as a single document request."""
+    if os.path.getsize(pdf_path) > MAX_SINGLE_REQUEST_BYTES:
+        return True
+    with open(pdf_path, 'rb') as f:
+        return len(PdfReader(f).pages) > MAX_SINGLE_REQUEST_PAGES
+
+def iter_pdf_chunks(pdf_path, pages_per_chunk=PAGES_PER_CHUNK):
+    """
+    Split a PDF into page ranges, yielding one chunk at a time.
+    
+    The source file is read lazily through an open handle, so only the
+    chunk currently being built is held in memory.
+    
+    Yields:
+    tuple: ((first_page, last_page), chunk_bytes) with 1-based page numbers
+    """
+    with open(pdf_path, 'rb') as f:
+        reader = PdfReader(f)
+        total_pages = len(reader.pages)
+        for start in range(0, total_pages, pages_per_chunk):
+            end = min(start + pages_per_chunk, total_pages)
+            writer = PdfWriter()
+            for page_index in range(start, end):
+                writer.add_page(reader.pages[page_index])
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            yield (start + 1, end), buffer.getvalue()
+
+def is_blank(value):
+    """Check whether an extracted metric value is missing."""
+    return value is None or (isinstance(value, str) and not value.strip())
+
+def values_agree(a, b, tolerance=0.005):
+    """Check whether two extracted values agree, allowing for rounding differences."""
+    a_num, b_num = parse_number(a), parse_number(b)
+    if a_num is None or b_num is None:
+        return str(a).strip() == str(b).strip()
+    return abs(a_num - b_num) <= tolerance * max(abs(a_num), abs(b_num), 1.0)
+
+def merge_partial_results(partials):
+    """
+    Deterministically merge partial extraction results from page chunks.
+    
+    Each field takes the value that the most chunks agree on (within
+    rounding, see values_agree). Ties go to the earliest chunk in page
+    order, since the primary statements precede notes and exhibits. Net
+    debt and EBITDA margin are derived from their components when no chunk
+    reported them. Chunks without data are listed in the notes.
+    
+    Parameters:
+    partials (list): (page_range, data) tuples, where data may be None
+    
+    Returns:
+    tuple: (merged data dict, list of reconciliation notes)
+    """
+    notes = [
+        f"Pages {page_range[0]}-{page_range[1]}: no data extracted"
+        for page_range, data in sorted(partials, key=lambda p: p[0][0]) if not data
+    ]
+    partials = sorted((p for p in partials if p[1]), key=lambda p: p[0][0])
+    merged = {section: {} for section in EXTRACTION_FIELDS}
+    
+    for section, fields in EXTRACTION_FIELDS.items():
+        for field in fields:
+            candidates = []
+            for page_range, data in partials:
+                value = (data.get(section) or {}).get(field)
+                if not is_blank(value):
+                    candidates.append((page_range, value))
+            
+            if not candidates:
+                merged[section][field] = ""
+                continue
+            
+            # max() keeps the first candidate on ties, i.e. the earliest chunk
+            chosen_range, chosen = max(
+                candidates,
+                key=lambda candidate: sum(values_agree(candidate[1], value) for _, value in candidates)
+            )
+            merged[section][field] = chosen
+            
+            for page_range, value in candidates:
+                if not values_agree(value, chosen):
+                    notes.append(
+                        f"{section}.{field}: kept {chosen} (pages {chosen_range[0]}-{chosen_range[1]}), "
+                        f"discarded {value} (pages {page_range[0]}-{page_range[1]})"
+                    )
+    
+    income_stmt = merged["Income_Statement"]
+    balance_sheet = merged["Balance_Sheet"]
+    
+    total_debt = parse_number(balance_sheet["Total_Debt"])
+    cash = parse_number(balance_sheet["Cash"])
+    if is_blank(balance_sheet["Net_Debt"]) and total_debt is not None and cash is not None:
+        balance_sheet["Net_Debt"] = round(total_debt - cash, 2)
+        notes.append("Balance_Sheet.Net_Debt: derived as Total_Debt - Cash")
+    
+    revenue = parse_number(income_stmt["Revenue"])
+    ebitda = parse_number(income_stmt["EBITDA"])
+    if is_blank(income_stmt["EBITDA_Margin"]) and revenue and ebitda is not None:
+        income_stmt["EBITDA_Margin"] = round(ebitda / revenue * 100, 2)
+        notes.append("Income_Statement.EBITDA_Margin: derived as EBITDA / Revenue")
+    
+    return merged, notes
+
+def extract_form_lbo_data_chunked(pdf_path, company_name, pages_per_chunk=PAGES_PER_CHUNK,
+                                  max_workers=MAX_CHUNK_WORKERS, model=CLAUDE_SONNET37, thinking=True):
+    """
+    Extract LBO data from a large filing (10-K, long 10-Q) in page chunks.
+    
+    Chunks are extracted in parallel, with at most max_workers chunks in
+    flight at once so memory stays bounded by the chunk size rather than
+    the document size. The partial results are merged with
+    merge_partial_results.
+    
+    Returns:
+    str: Combined output, starting with the merged JSON in <answer></answer> tags
+    followed by the reconciliation notes and the raw output of each chunk
+    
+    Raises:
+    ValueError: If any page range still has no data after one retry, since
+    the merged result could be missing the primary statements
+    """
+    partials = []
+    chunk_outputs = []
+    failed_ranges = []
+    
+    def record(page_range, output):
+        data = extract_json_from_output(output)
+        if not data:
+            print(f"⚠ No structured data in pages {page_range[0]}-{page_range[1]}")
+            failed_ranges.append(page_range)
+            return
+        chunk_outputs.append((page_range, output))
+        partials.append((page_range, data))
+        print(f"✓ Extracted pages {page_range[0]}-{page_range[1]}")
+    
+    def collect(futures):
+        for future in futures:
+            page_range = pending.pop(future)
+            try:
+                output = future.result()
+            except Exception as e:
+                print(f"❌ Error extracting pages {page_range[0]}-{page_range[1]}: {str(e)}")
+                failed_ranges.append(page_range)
+                continue
+            record(page_range, output)
+    
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for page_range, chunk_bytes in iter_pdf_chunks(pdf_path, pages_per_chunk):
+            if len(pending) >= max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = executor.submit(extract_pdf_bytes_lbo_data, chunk_bytes, company_name, page_range,
+                                     model, thinking)
+            pending[future] = page_range
+        collect(list(pending))
+    
+    # Retry failed chunks once, one at a time
+    retry_ranges, failed_ranges = set(failed_ranges), []
+    if retry_ranges:
+        for page_range, chunk_bytes in iter_pdf_chunks(pdf_path, pages_per_chunk):
+            if page_range not in retry_ranges:
+                continue
+            print(f"Retrying pages {page_range[0]}-{page_range[1]}...")
+            try:
+                output = extract_pdf_bytes_lbo_data(chunk_bytes, company_name, page_range, model, thinking)
+            except Exception as e:
+                print(f"❌ Error extracting pages {page_range[0]}-{page_range[1]}: {str(e)}")
+                failed_ranges.append(page_range)
+                continue
+            record(page_range, output)
+    
+    if failed_ranges:
+        missing = ", ".join(f"{start}-{end}" for start, end in sorted(failed_ranges))
+        raise ValueError(f"Incomplete extraction of {pdf_path}: no data from pages {missing}")
+    
+    merged, notes = merge_partial_results(partials)
+    
+    # The merged answer goes first so extract_json_from_output picks it up
+    full_output = f"<answer>\n{json.dumps(merged, indent=2)}\n</answer>\n\n"
+    full_output += "<reconciliation>\n" + "\n".join(notes or ["No conflicts between chunks"]) + "\n</reconciliation>\n"
+    for page_range, output in sorted(chunk_outputs):
+        full_output += f"\n<chunk pages=\"{page_range[0]}-{page_range[1]}\">\n{output}</chunk>\n"
+    
+    return full_output
+
+def get_neighbouring_quarters(conn, company_name, year, quarter):
+    """
+    Get stored revenue for the quarters around a period.
+    
+    Returns:
+    dict: {"previous": ..., "next": ..., "prior_year": ...} revenue values (None when not stored)
+    """
+    previous = (year, quarter - 1) if quarter > 1 else (year - 1, 4)
+    following = (year, quarter + 1) if quarter < 4 else (year + 1, 1)
+    periods = {"previous": previous, "next": following, "prior_year": (year - 1, quarter)}
+    
+    cursor = conn.cursor()
+    neighbours = {}
+    for name, (period_year, period_quarter) in periods.items():
+        cursor.execute('''
+            SELECT revenue FROM financial_metrics
+            WHERE company_name = ? AND year = ? AND quarter = ?
+            ORDER BY id DESC LIMIT 1
+        ''', (company_name, period_year, period_quarter))
+        row = cursor.fetchone()
+        neighbours[name] = parse_number(row[0]) if row else None
+    return neighbours
+
+def get_stored_period(conn, company_name, year, quarter):
+    """Get the latest stored (revenue, filing_date) for a company's quarter, or None."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT revenue, filing_date FROM financial_metrics
+        WHERE company_name = ? AND year = ? AND quarter = ?
+        ORDER BY id DESC LIMIT 1
+    ''', (company_name, year, quarter))
+    row = cursor.fetchone()
+    return (parse_number(row[0]), row[1]) if row else None
+
+def parse_filing_date(value):
+    """Parse a filing date in the formats the model returns, or None if it cannot be read."""
+    if is_blank(value):
+        return None
+    text = str(value).strip().replace('Sept.', 'Sep.').replace('.', '')
+    for date_format in ('%Y-%m-%d', '%B %d, %Y', '%b %d, %Y', '%B %d %Y', '%b %d %Y', '%m/%d/%Y'):
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+def validate_extraction(data, conn, company_name, replaces_stored=False):
+    """
+    Check an extraction result locally before accepting it.
+    
+    Checks that the required fields are present, that net debt matches total
+    debt minus cash, and that the EBITDA margin matches EBITDA over revenue.
+    The period is then checked against financial_metrics: a quarter that is
+    already stored must have the same revenue and filing date, and revenue
+    must be within NEIGHBOUR_REVENUE_BAND of the adjacent quarters. Form 10-K
+    results are checked as the Q4 record they would be saved as.
+    
+    Parameters:
+    replaces_stored (bool): The result will replace the stored row for its
+    period (a corrected or amended filing), so it is not compared against it
+    
+    Returns:
+    list: Problems found; empty when the result passes
+    """
+    if not data:
+        return ["no structured data in the output"]
+    
+    period_info = data.get('Period_Info') or {}
+    income_stmt = data.get('Income_Statement') or {}
+    balance_sheet = data.get('Balance_Sheet') or {}
+    growth_metrics = data.get('Growth_Metrics') or {}
+    
+    problems = []
+    required = [
+        ("Period_Info.Year", period_info.get('Year')),
+        ("Period_Info.Quarter", period_info.get('Quarter')),
+        ("Income_Statement.Revenue", income_stmt.get('Revenue')),
+        ("Income_Statement.EBITDA", income_stmt.get('EBITDA')),
+        ("Balance_Sheet.Cash", balance_sheet.get('Cash')),
+        ("Balance_Sheet.Total_Debt", balance_sheet.get('Total_Debt')),
+    ]
+    for name, value in required:
+        if parse_number(value) is None:
+            problems.append(f"missing {name}")
+    
+    revenue = parse_number(income_stmt.get('Revenue'))
+    ebitda = parse_number(income_stmt.get('EBITDA'))
+    margin = parse_number(income_stmt.get('EBITDA_Margin'))
+    cash = parse_number(balance_sheet.get('Cash'))
+    total_debt = parse_number(balance_sheet.get('Total_Debt'))
+    net_debt = parse_number(balance_sheet.get('Net_Debt'))
+    
+    if None not in (net_debt, total_debt, cash):
+        if abs(net_debt - (total_debt - cash)) > max(1.0, 0.02 * max(abs(total_debt), abs(cash))):
+            problems.append(f"Net_Debt {net_debt} does not match Total_Debt - Cash ({total_debt - cash:.2f})")
+    
+    if None not in (margin, ebitda) and revenue:
+        implied_margin = ebitda / revenue * 100
+        # Accept the margin either as a percentage or as a fraction
+        if min(abs(margin - implied_margin), abs(margin * 100 - implied_margin)) > 0.5:
+            problems.append(f"EBITDA_Margin {margin} does not match EBITDA / Revenue ({implied_margin:.2f}%)")
+    
+    if is_annual_filing(data):
+        try:
+            data = to_quarterly_record(conn, data, company_name)
+        except ValueError:
+            # The quarters needed to derive Q4 are not stored, so there is nothing to compare against
+            return problems
+        period_info = data['Period_Info']
+        growth_metrics = data['Growth_Metrics']
+        revenue = parse_number(data['Income_Statement'].get('Revenue'))
+    
+    year = parse_number(period_info.get('Year'))
+    quarter = parse_number(period_info.get('Quarter'))
+    if quarter is not None and quarter not in (1, 2, 3, 4):
+        problems.append(f"Quarter {quarter} is not 1-4")
+    elif year is not None and quarter is not None and revenue:
+        stored = None if replaces_stored else get_stored_period(conn, company_name, int(year), int(quarter))
+        if stored:
+            stored_revenue, stored_filing_date = stored
+            if stored_revenue is not None and not values_agree(revenue, stored_revenue, tolerance=0.01):
+                problems.append(
+                    f"Revenue {revenue} differs from the stored {int(year)} Q{int(quarter)} ({stored_revenue})"
+                )
+            new_date = parse_filing_date(period_info.get('Filing_Date'))
+            old_date = parse_filing_date(stored_filing_date)
+            if new_date and old_date and new_date != old_date:
+                problems.append(
+                    f"Filing_Date {new_date} differs from the stored {int(year)} Q{int(quarter)} ({old_date})"
+                )
+        
+        low, high = NEIGHBOUR_REVENUE_BAND
+        neighbours = get_neighbouring_quarters(conn, company_name, int(year), int(quarter))
+        for name in ("previous", "next"):
+            neighbour_revenue = neighbours[name]
+            if neighbour_revenue and not low <= revenue / neighbour_revenue <= high:
+                problems.append(f"Revenue {revenue} inconsistent with {name} quarter ({neighbour_revenue})")
+        
+        revenue_growth = parse_number(growth_metrics.get('Revenue_Growth'))
+        prior_year_revenue = neighbours["prior_year"]
+        if revenue_growth is not None and prior_year_revenue:
+            implied_growth = (revenue / prior_year_revenue - 1) * 100
+            if abs(revenue_growth - implied_growth) > 5:
+                problems.append(
+                    f"Revenue_Growth {revenue_growth} inconsistent with stored prior-year quarter ({implied_growth:.1f}%)"
+                )
+    
+    return problems
+
+class RoutingStats:
+    """Escalation and latency bookkeeping for one extraction run."""
+    
+    def __init__(self, latency_path=ESCALATION_LATENCY_PATH):
+        self.latency_path = latency_path
+        self.fast_latencies = []
+        self.escalated_fast_latencies = []
+        self.escalation_latencies = []
+        self.lock = threading.Lock()
+    
+    def load_escalation_history(self):
+        if not self.latency_path or not Path(self.latency_path).exists():
+            return []
+        try:
+            with open(self.latency_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+    
+    def save_escalation_latency(self, latency):
+        if not self.latency_path:
+            return
+        history = (self.load_escalation_history() + [latency])[-ESCALATION_LATENCY_HISTORY_SIZE:]
+        Path(self.latency_path).parent.mkdir(exist_ok=True)
+        with open(self.latency_path, 'w') as f:
+            json.dump(history, f)
+    
+    def escalation_baseline(self):
+        """Average large-model latency from past runs, or the configured baseline."""
+        history = self.load_escalation_history()
+        if history:
+            return sum(history) / len(history), f"average of {len(history)} recorded escalations"
+        return ESCALATION_LATENCY_BASELINE, "configured baseline"
+    
+    def record(self, fast_latency, escalation_latency=None):
+        with self.lock:
+            if escalation_latency is None:
+                self.fast_latencies.append(fast_latency)
+            else:
+                self.escalated_fast_latencies.append(fast_latency)
+                self.escalation_latencies.append(escalation_latency)
+                self.save_escalation_latency(escalation_latency)
+    
+    def report(self):
+        """Print the escalation rate and the latency saved by routing."""
+        accepted = len(self.fast_latencies)
+        escalated = len(self.escalation_latencies)
+        total = accepted + escalated
+        if not total:
+            return
+        
+        print(f"\nModel routing: {accepted}/{total} filings accepted from {FAST_EXTRACTION_MODEL}, "
+              f"{escalated} escalated to {ESCALATION_MODEL} ({escalated / total:.0%} escalation rate)")
+        if accepted:
+            print(f"Average fast-model latency: {sum(self.fast_latencies) / accepted:.1f}s")
+        if escalated:
+            print(f"Average escalation latency: {sum(self.escalation_latencies) / escalated:.1f}s")
+        
+        # Accepted filings skipped the large-model call; escalated ones paid for the fast attempt too
+        baseline, source = self.escalation_baseline()
+        saved = sum(baseline - latency for latency in self.fast_latencies)
+        wasted = sum(self.escalated_fast_latencies)
+        print(f"Estimated latency saved: {saved - wasted:.1f}s "
+              f"({saved:.1f}s on accepted filings, {wasted:.1f}s lost on failed fast attempts; "
+              f"large-model latency {baseline:.1f}s, {source})")
+
+def extract_with_routing(pdf_path, company_name, conn, stats, replaces_stored=False):
+    """
+    Extract a filing with the fast model, escalating to the large model when needed.
+    
+    The fast result is accepted only if validate_extraction finds no problems;
+    otherwise the filing is extracted again with the large model and extended
+    thinking. Oversized filings are extracted in page chunks either way.
+    Pass replaces_stored when the result will replace the stored row for its
+    period, as in watch mode.
+    
+    Returns:
+    str: The output of the accepted extraction
+    """
+    if should_chunk_pdf(pdf_path):
+        print(f"Large filing, sending to Claude in {PAGES_PER_CHUNK}-page chunks...")
+        extract = extract_form_lbo_data_chunked
+    else:
+        extract = extract_form_10q_lbo_data
+    
+    if not ENABLE_MODEL_ROUTING:
+        print("Sending to Claude for analysis...")
+        return extract(pdf_path, company_name, model=ESCALATION_MODEL, thinking=True)
+    
+    print(f"Sending to {FAST_EXTRACTION_MODEL} for analysis...")
+    start = time.perf_counter()
+    try:
+        results = extract(pdf_path, company_name, model=FAST_EXTRACTION_MODEL, thinking=False)
+        problems = validate_extraction(extract_json_from_output(results), conn, company_name, replaces_stored)
+    except Exception as e:
+        problems = [f"fast model request failed: {str(e)}"]
+    fast_latency = time.perf_counter() - start
+    
+    if not problems:
+        print(f"✓ Fast extraction passed validation in {fast_latency:.1f}s")
+        stats.record(fast_latency)
+        return results
+    
+    print(f"⚠ Fast extraction failed validation: {'; '.join(problems)}")
+    print(f"Escalating to {ESCALATION_MODEL} with extended thinking...")
+    start = time.perf_counter()
+    results = extract(pdf_path, company_name, model=ESCALATION_MODEL, thinking=True)
+    stats.record(fast_latency, time.perf_counter() - start)
+    return results
+
+def is_annual_filing(data):
+    """Check whether extracted data comes from a Form 10-K."""
+    form_type = str((data.get('Period_Info') or {}).get('Form_Type') or '')
+    return '10-K' in form_type.upper().replace(' ', '')
+
+def get_stored_quarter(conn, company_name, year, quarter):
+    """Get the latest stored (revenue, ebitda) for a company's quarter, or None."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT revenue, ebitda FROM financial_metrics
+        WHERE company_name = ? AND year = ? AND quarter = ?
+        ORDER BY id DESC LIMIT 1
+    ''', (company_name, year, quarter))
+    row = cursor.fetchone()
+    return (parse_number(row[0]), parse_number(row[1])) if row else None
+
+def to_quarterly_record(conn, data, company_name):
+    """
+    Map extracted data onto the quarterly financial_metrics schema.
+    
+    Form 10-Q data is returned unchanged. A Form 10-K reports the full fiscal
+    year, so its fourth quarter is derived as FY minus (Q1 + Q2 + Q3) for
+    revenue and EBITDA, using the quarters already stored. Balance sheet
+    items are year-end, i.e. Q4, values and CapEx is already year-to-date,
+    so both are kept. Growth is recomputed against the prior year's Q4 when
+    it is stored, and left blank otherwise.
+    
+    Raises:
+    ValueError: If the fiscal year or any of Q1-Q3 is missing, since annual
+    figures must not be saved as a quarterly row
+    """
+    if not is_annual_filing(data):
+        return data
+    
+    period_info = data.get('Period_Info') or {}
+    year = parse_number(period_info.get('Year'))
+    if year is None:
+        raise ValueError("Form 10-K without a fiscal year; annual figures not saved")
+    year = int(year)
+    
+    quarters = [get_stored_quarter(conn, company_name, year, quarter) for quarter in (1, 2, 3)]
+    if any(q is None or None in q for q in quarters):
+        raise ValueError(
+            f"Form 10-K for {year}: Q1-Q3 {year} revenue and EBITDA are not all stored, "
+            "so Q4 cannot be derived; annual figures not saved"
+        )
+    
+    income_stmt = data.get('Income_Statement') or {}
+    annual_revenue = parse_number(income_stmt.get('Revenue'))
+    annual_ebitda = parse_number(income_stmt.get('EBITDA'))
+    if annual_revenue is None or annual_ebitda is None:
+        raise ValueError(f"Form 10-K for {year} without full-year revenue and EBITDA; annual figures not saved")
+    
+    q4_revenue = round(annual_revenue - sum(q[0] for q in quarters), 2)
+    q4_ebitda = round(annual_ebitda - sum(q[1] for q in quarters), 2)
+    
+    record = {section: dict(data.get(section) or {}) for section in EXTRACTION_FIELDS}
+    record['Period_Info']['Year'] = year
+    record['Period_Info']['Quarter'] = 4
+    record['Income_Statement'].update({
+        'Revenue': q4_revenue,
+        'EBITDA': q4_ebitda,
+        'EBITDA_Margin': round(q4_ebitda / q4_revenue * 100, 2) if q4_revenue else "",
+    })
+    
+    prior_year_q4 = get_stored_quarter(conn, company_name, year - 1, 4)
+    growth = {'Revenue_Growth': "", 'EBITDA_Growth': ""}
+    if prior_year_q4:
+        prior_revenue, prior_ebitda = prior_year_q4
+        if prior_revenue:
+            growth['Revenue_Growth'] = round((q4_revenue / prior_revenue - 1) * 100, 2)
+        if prior_ebitda:
+            growth['EBITDA_Growth'] = round((q4_ebitda / prior_ebitda - 1) * 100, 2)
+    record['Growth_Metrics'].update(growth)
+    return record
+
 def save_to_database(conn, data, company_name):
     """Save the extracted financial data to SQLite database."""
     cursor = conn.cursor()
@@ -253,6 +852,9 @@ def main():
     
     print(f"\nFound {total_files} PDF files to process")
     
+    routing_stats = RoutingStats()
+    annual_filings = []
+    
     # Process each PDF file sequentially
     for i, pdf_file in enumerate(pdf_files, 1):
         print(f"\nProcessing file {i}/{total_files}: {pdf_file}")
@@ -260,8 +862,7 @@ def main():
         
         try:
             # Extract data
-            print("Sending to Claude for analysis...")
-            results = extract_form_10q_lbo_data(pdf_file, company_name)
+            results = extract_with_routing(pdf_file, company_name, conn, routing_stats)
             
             # Create output directory if it doesn't exist
             output_dir = Path("output")
@@ -276,7 +877,11 @@ def main():
             # Extract JSON data from output
             print("Extracting structured data...")
             json_data = extract_json_from_output(results)
-            if json_data:
+            if json_data and is_annual_filing(json_data):
+                # Q4 is derived from the quarters, so annual filings are saved last
+                annual_filings.append((json_data, company_name))
+                print("✓ Form 10-K data will be saved once all quarterly filings are processed")
+            elif json_data:
                 # Save to database
                 save_to_database(conn, json_data, company_name)
                 print(f"✓ Data saved to database for {company_name}")
@@ -305,9 +910,18 @@ def main():
                     time.sleep(1)
                 print("\r" + " " * 30 + "\r", end="", flush=True)  # Clear the countdown line
     
+    for json_data, company_name in annual_filings:
+        try:
+            save_to_database(conn, to_quarterly_record(conn, json_data, company_name), company_name)
+            print(f"✓ Q4 data derived from Form 10-K saved to database for {company_name}")
+        except ValueError as e:
+            print(f"⚠ {str(e)}")
+    
     # Close database connection
     conn.close()
     print("\nAll files processed!")
+    routing_stats.report()
+    report_hedging()
     
     # Run LBO analysis
     run_lbo_analysis()
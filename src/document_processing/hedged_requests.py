@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import random
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+
+# Hedging is off unless HEDGE_REQUESTS=1 is set in the environment
+HEDGING_ENABLED = os.environ.get("HEDGE_REQUESTS", "0") == "1"
+
+# Issue a duplicate request when the first token is later than this percentile of recent calls
+HEDGE_PERCENTILE = 0.95
+MAX_HEDGES_PER_MINUTE = 2
+LATENCY_HISTORY_SIZE = 100
+MIN_HISTORY_SAMPLES = 10
+DEFAULT_FIRST_TOKEN_DELAY = 30.0  # seconds, used until enough history has been collected
+
+# First-token latencies are kept between runs so the threshold survives restarts
+LATENCY_HISTORY_PATH = Path("output") / "latency_history.json"
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+class Attempt:
+    """One in-flight copy of a hedged request."""
+
+    def __init__(self, label):
+        self.label = label
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        self.error = None
+        # Set on the first token, or when the attempt ends without one
+        self.responded = threading.Event()
+        self.cancelled = threading.Event()
+
+    def on_first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self.responded.set()
+
+class HedgedCaller:
+    """
+    Issue a duplicate request when the first token is slow, keeping whichever finishes first.
+
+    A request is a callable taking (on_first_token, cancelled): it must call
+    on_first_token() when the first token arrives, stop early once the
+    cancelled event is set, and return its result. If the primary attempt has
+    not produced a token after the HEDGE_PERCENTILE first-token latency of
+    recent calls, a second attempt is started (at most max_hedges_per_minute
+    times per minute). The first attempt to succeed wins and the other is
+    cancelled.
+    """
+
+    def __init__(self, name, percentile_threshold=HEDGE_PERCENTILE,
+                 max_hedges_per_minute=MAX_HEDGES_PER_MINUTE, history_path=LATENCY_HISTORY_PATH,
+                 default_delay=DEFAULT_FIRST_TOKEN_DELAY):
+        self.name = name
+        self.percentile_threshold = percentile_threshold
+        self.max_hedges_per_minute = max_hedges_per_minute
+        self.history_path = history_path
+        self.default_delay = default_delay
+        self.lock = threading.Lock()
+        self.first_token_latencies = deque(self.load_history(), maxlen=LATENCY_HISTORY_SIZE)
+        self.hedge_times = deque()
+        self.hedges_issued = 0
+        self.hedges_won = 0
+        self.hedges_denied = 0
+        self.observed_latencies = []
+        self.unhedged_latencies = []
+        self.generation_times = deque(maxlen=LATENCY_HISTORY_SIZE)
+
+    def load_history(self):
+        if not self.history_path or not Path(self.history_path).exists():
+            return []
+        try:
+            with open(self.history_path) as f:
+                return json.load(f).get(self.name, [])
+        except (OSError, ValueError):
+            return []
+
+    def save_history(self):
+        if not self.history_path:
+            return
+        path = Path(self.history_path)
+        try:
+            history = json.loads(path.read_text()) if path.exists() else {}
+        except (OSError, ValueError):
+            history = {}
+        history[self.name] = list(self.first_token_latencies)
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(json.dumps(history))
+
+    def hedge_delay(self):
+        """Seconds to wait for the first token before hedging."""
+        with self.lock:
+            if len(self.first_token_latencies) < MIN_HISTORY_SAMPLES:
+                return self.default_delay
+            return percentile(list(self.first_token_latencies), self.percentile_threshold)
+
+    def take_hedge_budget(self):
+        """Reserve one hedge from the per-minute budget, if any is left."""
+        now = time.monotonic()
+        with self.lock:
+            while self.hedge_times and now - self.hedge_times[0] > 60:
+                self.hedge_times.popleft()
+            if len(self.hedge_times) >= self.max_hedges_per_minute:
+                self.hedges_denied += 1
+                return False
+            self.hedge_times.append(now)
+            self.hedges_issued += 1
+            return True
+
+    def call(self, request):
+        """Run a request with hedging and return the first successful result."""
+        finished = queue.Queue()
+
+        def run(attempt):
+            try:
+                result = request(attempt.on_first_token, attempt.cancelled)
+                finished.put((attempt, result, None))
+            except Exception as e:
+                attempt.error = e
+                finished.put((attempt, None, e))
+            finally:
+                attempt.responded.set()
+
+        def start(label):
+            attempt = Attempt(label)
+            threading.Thread(target=run, args=(attempt,), daemon=True).start()
+            return attempt
+
+        call_start = time.perf_counter()
+        primary = start("primary")
+        attempts = [primary]
+
+        if not primary.responded.wait(self.hedge_delay()) and self.take_hedge_budget():
+            attempts.append(start("hedge"))
+
+        errors = []
+        winner = None
+        result = None
+        while len(errors) < len(attempts):
+            attempt, result, error = finished.get()
+            if error is None:
+                winner = attempt
+                break
+            errors.append(error)
+        if winner is None:
+            raise errors[0]
+
+        elapsed = time.perf_counter() - call_start
+        for attempt in attempts:
+            if attempt is not winner:
+                attempt.cancelled.set()
+        self.record(attempts, winner, elapsed)
+        return result
+
+    def record(self, attempts, winner, elapsed):
+        """Update the first-token history and the latency metrics after a call."""
+        finished_at = time.perf_counter()
+        with self.lock:
+            for attempt in attempts:
+                if attempt.first_token_at is not None:
+                    self.first_token_latencies.append(attempt.first_token_at - attempt.start)
+            primary = attempts[0]
+            if primary is not winner and primary.first_token_at is None and primary.error is None:
+                # A primary cancelled before its first token would have taken at least this long;
+                # leaving it out would let the threshold learn only from fast calls
+                self.first_token_latencies.append(finished_at - primary.start)
+            if winner.first_token_at is not None:
+                self.generation_times.append(finished_at - winner.first_token_at)
+            self.observed_latencies.append(elapsed)
+
+            if winner is primary:
+                self.unhedged_latencies.append(elapsed)
+            else:
+                # The primary was cancelled, so estimate when it would have finished:
+                # its first token (or now, if none arrived yet) plus a typical generation time
+                self.hedges_won += 1
+                first_token_at = primary.first_token_at or finished_at
+                typical_generation = percentile(list(self.generation_times), 0.5) or 0.0
+                self.unhedged_latencies.append(first_token_at + typical_generation - primary.start)
+            self.save_history()
+
+    def report(self):
+        """Print hedge counts and p50/p95/p99 latency with and without hedging."""
+        with self.lock:
+            calls = len(self.observed_latencies)
+            if not calls:
+                return
+            print(f"\nRequest hedging ({self.name}): {calls} calls, {self.hedges_issued} hedges issued, "
+                  f"{self.hedges_won} won, {self.hedges_denied} denied by the {self.max_hedges_per_minute}/minute budget")
+            for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+                hedged = percentile(self.observed_latencies, fraction)
+                unhedged = percentile(self.unhedged_latencies, fraction)
+                print(f"{label}: {hedged:.2f}s hedged vs ~{unhedged:.2f}s estimated unhedged "
+                      f"({unhedged - hedged:.2f}s improvement)")
+
+hedged_callers = {}
+hedged_callers_lock = threading.Lock()
+
+def get_hedged_caller(name):
+    """Get the shared HedgedCaller for a call site, such as a model name."""
+    with hedged_callers_lock:
+        if name not in hedged_callers:
+            hedged_callers[name] = HedgedCaller(name)
+        return hedged_callers[name]
+
+def report_hedging():
+    """Print the metrics of every hedged caller used in this process."""
+    for caller in list(hedged_callers.values()):
+        caller.report()
+
+def stream_message(client, on_first_token, cancelled, **request):
+    """
+    Stream a Claude message, signalling the first token and stopping on cancellation.
+
+    Returns:
+    The final message, or None if the request was cancelled
+    """
+    with client.messages.stream(**request) as stream:
+        for event in stream:
+            if cancelled.is_set():
+                return None
+            if event.type == "content_block_delta":
+                on_first_token()
+        return stream.get_final_message()
+
+def create_message(client, hedge_name, **request):
+    """Create a Claude message, hedged when HEDGE_REQUESTS=1 and a plain request otherwise."""
+    if not HEDGING_ENABLED:
+        return client.messages.create(**request)
+    return get_hedged_caller(hedge_name).call(
+        lambda on_first_token, cancelled: stream_message(client, on_first_token, cancelled, **request)
+    )
+
+def make_standin_request(first_token_latency=0.02, total_latency=0.05,
+                         spike_probability=0.05, spike_latency=0.5, rng=None):
+    """
+    Build a local stand-in for an API call with injected first-token latency spikes.
+
+    Each attempt independently spikes with spike_probability, delaying its
+    first token by spike_latency. Attempts stop promptly when cancelled.
+    """
+    rng = rng or random.Random()
+
+    def request(on_first_token, cancelled):
+        delay = first_token_latency + (spike_latency if rng.random() < spike_probability else 0.0)
+        if cancelled.wait(delay):
+            return None
+        on_first_token()
+        if cancelled.wait(total_latency - first_token_latency):
+            return None
+        return "done"
+
+    return request
+
+def simulate(n_calls=200, spike_probability=0.05, seed=0):
+    """Compare latency with and without hedging against the local stand-in."""
+    rng = random.Random(seed)
+    request = make_standin_request(spike_probability=spike_probability, rng=rng)
+
+    unhedged = []
+    for _ in range(n_calls):
+        start = time.perf_counter()
+        request(lambda: None, threading.Event())
+        unhedged.append(time.perf_counter() - start)
+
+    caller = HedgedCaller("standin", max_hedges_per_minute=n_calls, history_path=None)
+    for _ in range(n_calls):
+        caller.call(request)
+
+    print(f"Stand-in: {n_calls} calls, {spike_probability:.0%} first-token spikes")
+    for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        print(f"{label}: unhedged {percentile(unhedged, fraction) * 1000:.0f} ms, "
+              f"hedged {percentile(caller.observed_latencies, fraction) * 1000:.0f} ms")
+    print(f"Hedges issued: {caller.hedges_issued}, won: {caller.hedges_won}")
+    return unhedged, caller.observed_latencies
+
+if __name__ == "__main__":
+    simulate()
@@ -0,0 +1,24 @@
+import math
+
+def parse_number(value):
+    """
+    Parse an extracted metric such as 123.4, "1,234.5", "12.3%" or "(3.2)" into a float.
+
+    Accounting-style parentheses are read as negatives. Returns None for
+    values that are not numbers, including NaN and infinities.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        cleaned = value.strip().replace(',', '').replace('$', '').replace('%', '')
+        if cleaned.startswith('(') and cleaned.endswith(')'):
+            cleaned = '-' + cleaned[1:-1]
+        try:
+            number = float(cleaned)
+        except ValueError:
+            return None
+    else:
+        return None
+    return number if math.isfinite(number) else None
@@ -1,6 +1,16 @@
 import sqlite3
+import csv
+import json
+import sys
+import argparse
 from tabulate import tabulate
 
+PAGE_SIZE = 25
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = ['csv', 'jsonl', 'parquet']
+
+METRICS_HEADERS = ['Company', 'Year', 'Quarter', 'Revenue', 'EBITDA', 'EBITDA Margin', 'Cash', 'Total Debt', 'Net Debt']
+
 def connect_db():
     """Connect to the SQLite database."""
     return sqlite3.connect('financial_metrics.db')
@@ -52,20 +62,236 @@ def get_company_metrics(company_name=None):
         ''')
     
     rows = cursor.fetchall()
-    headers = ['Company', 'Year', 'Quarter', 'Revenue', 'EBITDA', 'EBITDA Margin', 'Cash', 'Total Debt', 'Net Debt']
+    headers = METRICS_HEADERS
     conn.close()
     
     return headers, rows
 
+def get_company_metrics_page(company_name=None, page_size=PAGE_SIZE, cursor_key=None):
+    """
+    Get one page of financial metrics using keyset (cursor) pagination.
+    
+    Rows are ordered by company, year DESC, quarter DESC and id, with missing
+    years and quarters sorted last. Each page resumes after the last row of
+    the previous one, so paging deep into the table costs the same as the
+    first page.
+    
+    Parameters:
+    company_name (str): Optional company name to filter results
+    page_size (int): Maximum number of rows to return
+    cursor_key (tuple): The next_cursor returned with the previous page, or None for the first page
+    
+    Returns:
+    tuple: (headers, rows, next_cursor) where next_cursor is None on the last page
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    
+    conditions = []
+    params = []
+    if company_name:
+        conditions.append('company_name = ?')
+        params.append(company_name)
+    if cursor_key:
+        last_company, last_year, last_quarter, last_id = cursor_key
+        conditions.append('''(
+            company_name > ?
+            OR (company_name = ? AND (
+                COALESCE(year, -1) < ?
+                OR (COALESCE(year, -1) = ? AND (
+                    COALESCE(quarter, -1) < ?
+                    OR (COALESCE(quarter, -1) = ? AND id > ?)
+                ))
+            ))
+        )''')
+        params.extend([last_company, last_company, last_year, last_year,
+                       last_quarter, last_quarter, last_id])
+    
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    cursor.execute(f'''
+        SELECT 
+            company_name,
+            year,
+            quarter,
+            revenue,
+            ebitda,
+            ebitda_margin,
+            cash,
+            total_debt,
+            net_debt,
+            COALESCE(year, -1),
+            COALESCE(quarter, -1),
+            id
+        FROM financial_metrics
+        {where_clause}
+        ORDER BY company_name, COALESCE(year, -1) DESC, COALESCE(quarter, -1) DESC, id
+        LIMIT ?
+    ''', params + [page_size + 1])
+    
+    rows = cursor.fetchall()
+    conn.close()
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = (last[0], last[9], last[10], last[11])
+    
+    return METRICS_HEADERS, [row[:9] for row in rows], next_cursor
+
+def print_metrics_pages(company_name=None, page_size=PAGE_SIZE):
+    """Print financial metrics one page at a time, prompting before each next page."""
+    cursor_key = None
+    page = 1
+    while True:
+        headers, rows, cursor_key = get_company_metrics_page(company_name, page_size, cursor_key)
+        if not rows and page == 1:
+            print("\nNo metrics found")
+            return
+        print(f"\nPage {page}")
+        print(tabulate(rows, headers=headers, tablefmt='grid'))
+        if cursor_key is None:
+            return
+        if input("Press Enter for the next page or 'q' to stop: ").strip().lower() == 'q':
+            return
+        page += 1
+
+def iter_metric_batches(conn, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream every row of financial_metrics in batches of at most batch_size.
+    
+    Yields:
+    tuple: (column_names, rows) for each batch
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM financial_metrics ORDER BY id')
+    columns = [description[0] for description in cursor.description]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield columns, rows
+
+def get_metric_columns(conn):
+    """Get (name, declared_type) for each column of financial_metrics."""
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA table_info(financial_metrics)')
+    return [(row[1], row[2].upper()) for row in cursor.fetchall()]
+
+def export_csv(conn, output_path, batch_size=EXPORT_BATCH_SIZE):
+    """Stream financial_metrics to a CSV file."""
+    count = 0
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in get_metric_columns(conn)])
+        for _, rows in iter_metric_batches(conn, batch_size):
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+def export_jsonl(conn, output_path, batch_size=EXPORT_BATCH_SIZE):
+    """Stream financial_metrics to a JSON Lines file, one object per row."""
+    count = 0
+    with open(output_path, 'w') as f:
+        for columns, rows in iter_metric_batches(conn, batch_size):
+            for row in rows:
+                f.write(json.dumps(dict(zip(columns, row))) + '\n')
+            count += len(rows)
+    return count
+
+def export_parquet(conn, output_path, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream financial_metrics to a Parquet file, one row group per batch.
+    
+    The Parquet schema follows the declared SQLite column types. Values that
+    do not match (for example a REAL column holding text the model returned)
+    are written as null.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+    
+    arrow_types = {'INTEGER': pa.int64(), 'REAL': pa.float64()}
+    columns = get_metric_columns(conn)
+    schema = pa.schema([(name, arrow_types.get(declared, pa.string())) for name, declared in columns])
+    
+    def coerce(value, declared):
+        if value is None:
+            return None
+        try:
+            if declared == 'INTEGER':
+                return int(value)
+            if declared == 'REAL':
+                return float(value)
+        except (TypeError, ValueError):
+            return None
+        return str(value)
+    
+    count = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for _, rows in iter_metric_batches(conn, batch_size):
+            arrays = [
+                pa.array([coerce(row[i], declared) for row in rows], type=schema.field(i).type)
+                for i, (_, declared) in enumerate(columns)
+            ]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            count += len(rows)
+    return count
+
+def export_metrics(output_path, export_format, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Export the whole financial_metrics table without loading it into memory.
+    
+    Parameters:
+    output_path (str): File to write
+    export_format (str): One of 'csv', 'jsonl' or 'parquet'
+    batch_size (int): Number of rows fetched from SQLite per batch
+    
+    Returns:
+    int: Number of rows exported
+    """
+    exporters = {'csv': export_csv, 'jsonl': export_jsonl, 'parquet': export_parquet}
+    if export_format not in exporters:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    
+    conn = connect_db()
+    try:
+        return exporters[export_format](conn, output_path, batch_size)
+    finally:
+        conn.close()
+
+def export_main(argv):
+    """Command-line entry point for bulk export."""
+    parser = argparse.ArgumentParser(
+        prog='query_database.py export',
+        description='Stream the financial_metrics table to a file'
+    )
+    parser.add_argument('output', help='Output file path')
+    parser.add_argument('--format', choices=EXPORT_FORMATS,
+                        help='Export format (default: inferred from the output file extension)')
+    parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE,
+                        help=f'Rows fetched per batch (default: {EXPORT_BATCH_SIZE})')
+    args = parser.parse_args(argv)
+    
+    export_format = args.format or args.output.rsplit('.', 1)[-1].lower()
+    if export_format not in EXPORT_FORMATS:
+        parser.error(f"cannot infer format from '{args.output}', use --format")
+    
+    count = export_metrics(args.output, export_format, args.batch_size)
+    print(f"✓ Exported {count} rows to {args.output}")
+
 def main():
     while True:
         print("\nFinancial Metrics Database Query Tool")
         print("1. List all companies")
         print("2. View metrics for a specific company")
         print("3. View all companies' metrics")
-        print("4. Exit")
+        print("4. Export all metrics to a file")
+        print("5. Exit")
         
-        choice = input("\nEnter your choice (1-4): ")
+        choice = input("\nEnter your choice (1-5): ")
         
         if choice == '1':
             companies = get_all_companies()
@@ -82,18 +308,28 @@ def main():
             try:
                 idx = int(input("\nEnter company number: ")) - 1
                 if 0 <= idx < len(companies):
-                    headers, rows = get_company_metrics(companies[idx])
-                    print("\n" + tabulate(rows, headers=headers, tablefmt='grid'))
+                    print_metrics_pages(companies[idx])
                 else:
                     print("Invalid company number")
             except ValueError:
                 print("Please enter a valid number")
                 
         elif choice == '3':
-            headers, rows = get_company_metrics()
-            print("\n" + tabulate(rows, headers=headers, tablefmt='grid'))
+            print_metrics_pages()
             
         elif choice == '4':
+            export_format = input(f"\nFormat ({', '.join(EXPORT_FORMATS)}): ").strip().lower()
+            if export_format not in EXPORT_FORMATS:
+                print("Invalid format")
+                continue
+            output_path = input("Output file: ").strip() or f"financial_metrics.{export_format}"
+            try:
+                count = export_metrics(output_path, export_format)
+                print(f"✓ Exported {count} rows to {output_path}")
+            except Exception as e:
+                print(f"❌ Error exporting metrics: {str(e)}")
+            
+        elif choice == '5':
             print("Goodbye!")
             break
             
@@ -101,4 +337,7 @@ def main():
             print("Invalid choice. Please try again.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        export_main(sys.argv[2:])
+    else:
+        main()
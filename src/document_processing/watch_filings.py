@@ -0,0 +1,362 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+import traceback
+from pathlib import Path
+from datetime import datetime
+
+try:
+    from . import data_extraction
+    from .hedged_requests import report_hedging
+    from ..lbo_modeling import lbo_prompt
+except ImportError:
+    import data_extraction
+    from hedged_requests import report_hedging
+    # Run as a script: make the sibling lbo_modeling directory importable
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lbo_modeling"))
+    import lbo_prompt
+
+FILINGS_DIR = "data/sec_filings"
+MANIFEST_PATH = Path("output") / "filings_manifest.json"
+POLL_INTERVAL = 5  # seconds between scans of the filings tree
+DEBOUNCE_SECONDS = 10  # a burst of changes is processed once the tree is quiet this long
+RATE_LIMIT_DELAY = 60  # seconds between extraction requests, as in data_extraction.main
+RETRY_BASE_DELAY = 60  # seconds before a failed filing is first retried, doubling on each failure
+RETRY_MAX_DELAY = 3600
+MAX_EXTRACTION_ATTEMPTS = 5  # after this many failures a filing is left alone until it changes
+
+def scan_filings(directory=FILINGS_DIR):
+    """
+    Stat every PDF under the filings tree.
+
+    Only directory entries are read, never file contents, so a scan stays
+    cheap however many filings there are.
+
+    Returns:
+    dict: PDF path -> (size, mtime_ns)
+    """
+    snapshot = {}
+    if not os.path.isdir(directory):
+        return snapshot
+    pending = [directory]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.lower().endswith('.pdf'):
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+def file_sha256(path):
+    """Hash a file in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(path=MANIFEST_PATH):
+    """Load the manifest of processed filings, or None if there is none yet."""
+    if not Path(path).exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    path = Path(path)
+    path.parent.mkdir(exist_ok=True)
+    temp_path = path.with_suffix('.json.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+def manifest_entry(path, size, mtime_ns):
+    return {"size": size, "mtime_ns": mtime_ns, "sha256": file_sha256(path)}
+
+def find_changed_filings(snapshot, manifest):
+    """
+    Compare a scan against the manifest.
+
+    Files whose size and modification time match the manifest are skipped
+    without being read. Files that were touched but whose content hash is
+    unchanged are not reported, but their manifest entry is refreshed.
+
+    Returns:
+    dict: Path -> new manifest entry for each new or changed PDF
+    """
+    changed = {}
+    for path, (size, mtime_ns) in sorted(snapshot.items()):
+        known = manifest.get(path)
+        if known and (known["size"], known["mtime_ns"]) == (size, mtime_ns):
+            continue
+        entry = manifest_entry(path, size, mtime_ns)
+        if known and known["sha256"] == entry["sha256"]:
+            manifest[path] = entry
+            continue
+        changed[path] = entry
+    return changed
+
+def wait_for_quiet(directory, snapshot, debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL,
+                   stop_event=None):
+    """
+    Keep scanning until the tree has not changed for `debounce` seconds.
+
+    This coalesces a burst of copies into one processing pass and avoids
+    reading PDFs that are still being written.
+
+    Returns:
+    dict: The settled snapshot, or None if stop_event was set before the tree settled
+    """
+    stop_event = stop_event or threading.Event()
+    quiet_since = time.monotonic()
+    while time.monotonic() - quiet_since < debounce:
+        if stop_event.wait(min(poll_interval, debounce)):
+            return None
+        current = scan_filings(directory)
+        if current != snapshot:
+            snapshot = current
+            quiet_since = time.monotonic()
+    return snapshot
+
+def schedule_retry(failures, path, stat):
+    """
+    Record a failed filing and back off exponentially before retrying it.
+
+    After MAX_EXTRACTION_ATTEMPTS failures the filing is not retried until it changes.
+    """
+    attempts = failures[path]["attempts"] + 1 if path in failures else 1
+    if attempts >= MAX_EXTRACTION_ATTEMPTS:
+        failures[path] = {"stat": stat, "attempts": attempts, "retry_at": float('inf')}
+        print(f"❌ Giving up on {path} after {attempts} failed attempts; it will be retried when it changes")
+        return
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    failures[path] = {"stat": stat, "attempts": attempts, "retry_at": time.monotonic() + delay}
+    print(f"⚠ Will retry {path} in {delay}s (attempt {attempts} failed)")
+
+def is_deferred(path, stat, failures, waiting_annual):
+    """
+    Whether an unchanged filing should not be extracted yet.
+
+    That is the case when it failed earlier and is not due for a retry, or
+    when it is a 10-K that was already extracted and is waiting for its
+    quarters to be stored.
+    """
+    waiting = waiting_annual.get(path)
+    if waiting and (waiting[0]["size"], waiting[0]["mtime_ns"]) == stat:
+        return True
+    failure = failures.get(path)
+    return failure is not None and failure["stat"] == stat and time.monotonic() < failure["retry_at"]
+
+def replace_in_database(conn, data, company_name):
+    """Save extracted data, replacing any earlier rows for the same company and period."""
+    period_info = data.get('Period_Info', {})
+    cursor = conn.cursor()
+    cursor.execute(
+        'DELETE FROM financial_metrics WHERE company_name = ? AND year = ? AND quarter = ?',
+        (company_name, period_info.get('Year'), period_info.get('Quarter'))
+    )
+    data_extraction.save_to_database(conn, data, company_name)
+
+def extract_filings(paths, routing_stats, waiting_annual=None):
+    """
+    Extract new or changed filings into the database.
+
+    As in data_extraction.main, Form 10-K data is saved after the quarterly
+    filings, since its Q4 is derived from them. A 10-K whose Q1-Q3 are not
+    stored yet is returned with its extracted data instead of being thrown
+    away, so a later pass can save it without extracting it again.
+
+    Parameters:
+    paths (list): PDFs to extract
+    routing_stats (RoutingStats): Model routing bookkeeping for this pass
+    waiting_annual (dict): Path -> (company_name, data) of 10-Ks extracted
+    on earlier passes, saved here along with any new ones
+
+    Returns:
+    tuple: (set of paths saved to the database, set of companies whose
+    metrics were updated, dict of the 10-Ks that still cannot be saved in
+    the same form as waiting_annual). Paths in none of these failed to
+    extract.
+    """
+    conn = data_extraction.init_database()
+    output_dir = Path("output")
+    output_dir.mkdir(exist_ok=True)
+    succeeded = set()
+    updated = set()
+    annual = dict(waiting_annual or {})
+    unsaved = {}
+    try:
+        for i, pdf_path in enumerate(paths):
+            pdf_file = Path(pdf_path)
+            company_name = pdf_file.parent.name
+            print(f"\nProcessing new filing {i + 1}/{len(paths)}: {pdf_file}")
+            if i > 0:
+                time.sleep(RATE_LIMIT_DELAY)
+            try:
+                # replace_in_database overwrites the stored period, so don't validate against it
+                results = data_extraction.extract_with_routing(pdf_file, company_name, conn, routing_stats,
+                                                               replaces_stored=True)
+                output_file = output_dir / f"{company_name}_{pdf_file.stem}_analysis.json"
+                with open(output_file, 'w') as f:
+                    f.write(results)
+
+                json_data = data_extraction.extract_json_from_output(results)
+                if not json_data:
+                    print("⚠ No structured data found in the output")
+                elif data_extraction.is_annual_filing(json_data):
+                    annual[pdf_path] = (company_name, json_data)
+                else:
+                    replace_in_database(conn, json_data, company_name)
+                    succeeded.add(pdf_path)
+                    updated.add(company_name)
+                    print(f"✓ Data saved to database for {company_name}")
+            except Exception as e:
+                print(f"❌ Error processing {pdf_file}: {str(e)}")
+
+        # Q4 is derived from the quarters, so annual filings are saved last
+        for pdf_path, (company_name, json_data) in annual.items():
+            try:
+                record = data_extraction.to_quarterly_record(conn, json_data, company_name)
+                replace_in_database(conn, record, company_name)
+            except Exception as e:
+                print(f"⚠ {pdf_path} not saved yet, keeping its extracted data: {str(e)}")
+                unsaved[pdf_path] = (company_name, json_data)
+                continue
+            succeeded.add(pdf_path)
+            updated.add(company_name)
+            print(f"✓ Annual data saved to database for {company_name} as Q4")
+    finally:
+        conn.close()
+    return succeeded, updated, unsaved
+
+def reanalyze_company(company_name):
+    """
+    Re-run the LBO analysis for one company and save it to the output directory.
+
+    If the analysis fails, the previously saved analysis is kept.
+
+    Returns:
+    bool: True if a new analysis was saved
+    """
+    company_data = lbo_prompt.get_financial_data(company_name)
+    if company_data.empty:
+        print(f"⚠️ No data found for {company_name}")
+        return False
+    print(f"\nPerforming LBO analysis for {company_name}...")
+    analysis = lbo_prompt.perform_lbo_analysis(company_data)
+    if analysis.startswith(lbo_prompt.ANALYSIS_ERROR_PREFIX):
+        print(f"⚠ Keeping the previous analysis for {company_name}")
+        return False
+    return lbo_prompt.save_analysis(company_name, analysis)
+
+def watch(directory=FILINGS_DIR, poll_interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS,
+          on_publish=None, stop_event=None):
+    """
+    Watch the filings tree and incrementally re-analyze affected companies.
+
+    New or changed PDFs are extracted, and the LBO analysis is re-run only
+    for the companies they belong to. Filings that fail are retried with
+    backoff. On the first run without a manifest, existing filings of
+    companies that already have data in the database are treated as
+    processed, and all other filings are extracted.
+
+    Parameters:
+    directory (str): Root of the filings tree, one subdirectory per company
+    poll_interval (float): Seconds between scans
+    debounce (float): Quiet period required before processing a burst of changes
+    on_publish (callable): Called with (company_name, published_at) after an analysis is saved
+    stop_event (threading.Event): Stops the watcher when set
+    """
+    stop_event = stop_event or threading.Event()
+    manifest = load_manifest()
+    if manifest is None:
+        manifest = {}
+        stored_companies = set(lbo_prompt.get_available_companies())
+        if stored_companies:
+            print("No filings manifest found; recording filings of companies in the database as already processed")
+            for path, (size, mtime_ns) in scan_filings(directory).items():
+                if Path(path).parent.name in stored_companies:
+                    manifest[path] = manifest_entry(path, size, mtime_ns)
+            save_manifest(manifest)
+
+    # Filings that failed to extract are kept out of the manifest and retried with backoff
+    failures = {}
+    # 10-Ks extracted before their Q1-Q3 were stored: path -> (manifest entry, company_name, data).
+    # They are saved on a later pass, once new filings have been extracted, without another model call
+    waiting_annual = {}
+
+    print(f"Watching {directory} for new filings (every {poll_interval}s)")
+    while not stop_event.is_set():
+        try:
+            snapshot = scan_filings(directory)
+            removed = set(manifest) - set(snapshot)
+            pending = [
+                path for path, stat in snapshot.items()
+                if (path not in manifest or (manifest[path]["size"], manifest[path]["mtime_ns"]) != stat)
+                and not is_deferred(path, stat, failures, waiting_annual)
+            ]
+            if removed or pending:
+                snapshot = wait_for_quiet(directory, snapshot, debounce, poll_interval, stop_event)
+                if snapshot is None:
+                    break
+                for path in set(manifest) - set(snapshot):
+                    print(f"Filing removed: {path}")
+                    del manifest[path]
+                for path in set(failures) - set(snapshot):
+                    del failures[path]
+                for path in set(waiting_annual) - set(snapshot):
+                    del waiting_annual[path]
+
+                changed = {
+                    path: entry for path, entry in find_changed_filings(snapshot, manifest).items()
+                    if not is_deferred(path, snapshot[path], failures, waiting_annual)
+                }
+                companies = set()
+                if changed:
+                    # A waiting 10-K that changed since it was extracted is extracted again
+                    for path in changed:
+                        waiting_annual.pop(path, None)
+                    entries = {path: waiting[0] for path, waiting in waiting_annual.items()}
+                    entries.update(changed)
+
+                    routing_stats = data_extraction.RoutingStats()
+                    succeeded, companies, unsaved = extract_filings(
+                        list(changed), routing_stats,
+                        {path: (company_name, data) for path, (_, company_name, data) in waiting_annual.items()}
+                    )
+                    routing_stats.report()
+
+                    waiting_annual = {
+                        path: (entries[path], company_name, data)
+                        for path, (company_name, data) in unsaved.items()
+                    }
+                    for path, entry in entries.items():
+                        if path in succeeded:
+                            manifest[path] = entry
+                            failures.pop(path, None)
+                        elif path in unsaved:
+                            failures.pop(path, None)
+                        else:
+                            schedule_retry(failures, path, snapshot[path])
+                save_manifest(manifest)
+
+                for company_name in sorted(companies):
+                    if reanalyze_company(company_name) and on_publish:
+                        on_publish(company_name, datetime.now().isoformat(timespec='seconds'))
+                if changed:
+                    report_hedging()
+        except Exception as e:
+            print(f"❌ Error in watch loop: {str(e)}")
+            traceback.print_exc()
+        stop_event.wait(poll_interval)
+
+if __name__ == "__main__":
+    try:
+        watch()
+    except KeyboardInterrupt:
+        print("Watcher stopped")
@@ -0,0 +1,352 @@
+import sqlite3
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+
+from .debt_schedule import solve_debt_schedules
+from ..document_processing.metric_values import parse_number
+
+DB_PATH = 'financial_metrics.db'
+
+# Baseline deal assumptions, matching the ones given to Claude in lbo_prompt.py.
+# Rates and percentages are decimals (0.053 = 5.3%), money is in millions USD.
+DEFAULT_ASSUMPTIONS = {
+    "entry_multiple": 10.0,
+    "exit_multiple": 10.0,
+    "sofr": 0.053,
+    "senior_leverage": 4.0,
+    "senior_spread": 0.03,
+    "senior_amortization": 0.10,
+    "sub_leverage": 2.0,
+    "sub_spread": 0.05,
+    "min_cash": 10.0,
+    "sweep_pct": 1.0,
+    "revolver_limit": 0.0,
+    "revolver_spread": 0.025,
+    "sub_pik": 0.0,
+    "projection_years": 5,
+    "growth_taper": 0.005,
+    "margin_expansion": 0.0025,
+}
+
+# Accepted (minimum, maximum) for each assumption
+ASSUMPTION_RANGES = {
+    "entry_multiple": (0.1, 100.0),
+    "exit_multiple": (0.0, 100.0),
+    "sofr": (0.0, 1.0),
+    "senior_leverage": (0.0, 20.0),
+    "senior_spread": (0.0, 1.0),
+    "senior_amortization": (0.0, 1.0),
+    "sub_leverage": (0.0, 20.0),
+    "sub_spread": (0.0, 1.0),
+    "min_cash": (0.0, 1e6),
+    "sweep_pct": (0.0, 1.0),
+    "revolver_limit": (0.0, 1e6),
+    "revolver_spread": (0.0, 1.0),
+    "sub_pik": (0.0, 1.0),
+    "projection_years": (1, 30),
+    "growth_taper": (-1.0, 1.0),
+    "margin_expansion": (-1.0, 1.0),
+}
+
+SCENARIO_CACHE_SIZE = 256
+
+def parse_assumptions(overrides):
+    """
+    Merge assumption overrides into the defaults.
+
+    Parameters:
+    overrides (dict): Assumption names mapped to numbers or numeric strings
+
+    Returns:
+    dict: A complete, validated set of assumptions
+
+    Raises:
+    ValueError: If an override is unknown, not numeric or out of range
+    """
+    assumptions = dict(DEFAULT_ASSUMPTIONS)
+    for name, value in overrides.items():
+        if name not in DEFAULT_ASSUMPTIONS:
+            raise ValueError(f"Unknown assumption: {name}")
+        number = parse_number(value)
+        if number is None or not math.isfinite(number):
+            raise ValueError(f"Assumption {name} must be a finite number, got {value!r}")
+        low, high = ASSUMPTION_RANGES[name]
+        if not low <= number <= high:
+            raise ValueError(f"Assumption {name} must be between {low:g} and {high:g}, got {number:g}")
+        assumptions[name] = number
+
+    if assumptions["projection_years"] != int(assumptions["projection_years"]):
+        raise ValueError("projection_years must be a whole number")
+    assumptions["projection_years"] = int(assumptions["projection_years"])
+    if assumptions["sub_pik"] not in (0, 1):
+        raise ValueError("sub_pik must be 0 or 1")
+    return assumptions
+
+def load_company_metrics(company_name, db_path=DB_PATH):
+    """
+    Load a company's quarterly metrics from SQLite, oldest quarter first.
+
+    The batch pipeline appends a row each time a filing is extracted, so only
+    the latest row (highest id) for each period is kept, as in
+    data_extraction.get_stored_quarter.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT year, quarter, revenue, ebitda, ebitda_margin, cash, total_debt,
+                   working_capital, capex_to_revenue, revenue_growth
+            FROM financial_metrics
+            WHERE id IN (
+                SELECT MAX(id) FROM financial_metrics
+                WHERE company_name = ?
+                GROUP BY year, quarter
+            )
+            ORDER BY year, quarter
+        ''', (company_name,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+def data_fingerprint(rows):
+    """Hash the metric rows a scenario is computed from."""
+    payload = json.dumps(rows, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def assumptions_hash(assumptions):
+    """Hash a complete set of assumptions, independent of key order."""
+    payload = json.dumps(sorted(assumptions.items()))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def average(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def build_base_case(rows):
+    """
+    Derive the LBO starting point from quarterly metrics.
+
+    Revenue and EBITDA are trailing twelve months (annualized when fewer than
+    four quarters are available). Growth, margin and CapEx intensity are
+    historical averages, and working capital is held at its latest share of
+    revenue, as in the prompt's assumptions.
+
+    Raises:
+    ValueError: If no quarter has both revenue and EBITDA
+    """
+    quarters = [
+        row for row in rows
+        if parse_number(row["revenue"]) is not None and parse_number(row["ebitda"]) is not None
+    ]
+    if not quarters:
+        raise ValueError("No quarters with both revenue and EBITDA")
+
+    recent = quarters[-4:]
+    annualize = 4 / len(recent)
+    ttm_revenue = sum(parse_number(row["revenue"]) for row in recent) * annualize
+    ttm_ebitda = sum(parse_number(row["ebitda"]) for row in recent) * annualize
+    if ttm_revenue <= 0:
+        raise ValueError("Trailing revenue must be positive")
+
+    margin = average(
+        parse_number(row["ebitda"]) / parse_number(row["revenue"])
+        for row in quarters if parse_number(row["revenue"])
+    )
+    growth = average(parse_number(row["revenue_growth"]) for row in rows)
+    capex_pct = average(parse_number(row["capex_to_revenue"]) for row in rows)
+
+    latest = rows[-1]
+    working_capital = parse_number(latest["working_capital"])
+
+    return {
+        "ttm_revenue": ttm_revenue,
+        "ttm_ebitda": ttm_ebitda,
+        "revenue_growth": (growth or 0.0) / 100,
+        "ebitda_margin": margin if margin is not None else ttm_ebitda / ttm_revenue,
+        "capex_to_revenue": (capex_pct or 0.0) / 100,
+        "working_capital_to_revenue": (working_capital or 0.0) / ttm_revenue,
+        "quarters_used": len(recent),
+        "last_period": f"{latest['year']} Q{latest['quarter']}",
+    }
+
+def compute_lbo(base_case, assumptions):
+    """
+    Project the deal and compute sponsor returns.
+
+    Pre-tax, like the model described in the prompt: cash flow available
+    for debt service is EBITDA less CapEx and the change in working capital.
+    The debt schedule (average-balance interest, mandatory senior
+    amortization, cash sweep, revolver and PIK toggle) is solved by
+    debt_schedule.solve_debt_schedules. The sponsor funds the minimum cash
+    balance at close.
+
+    Returns:
+    dict: "sources_and_uses", "projections" (one entry per year), "returns"
+    and solver "diagnostics"
+    """
+    a = assumptions
+    entry_ebitda = base_case["ttm_ebitda"]
+    entry_ev = entry_ebitda * a["entry_multiple"]
+    senior_initial = entry_ebitda * a["senior_leverage"]
+    sub_initial = entry_ebitda * a["sub_leverage"]
+    equity_invested = entry_ev + a["min_cash"] - senior_initial - sub_initial
+
+    revenue = base_case["ttm_revenue"]
+    working_capital = revenue * base_case["working_capital_to_revenue"]
+    growth = base_case["revenue_growth"]
+    margin = base_case["ebitda_margin"]
+
+    projections = []
+    for year in range(1, a["projection_years"] + 1):
+        revenue *= 1 + growth
+        margin += a["margin_expansion"]
+        ebitda = revenue * margin
+        capex = revenue * base_case["capex_to_revenue"]
+        new_working_capital = revenue * base_case["working_capital_to_revenue"]
+        change_in_working_capital = new_working_capital - working_capital
+        working_capital = new_working_capital
+
+        projections.append({
+            "year": year,
+            "revenue": revenue,
+            "ebitda": ebitda,
+            "ebitda_margin": margin,
+            "capex": capex,
+            "change_in_working_capital": change_in_working_capital,
+            "cash_flow_before_interest": ebitda - capex - change_in_working_capital,
+        })
+        growth -= a["growth_taper"]
+
+    schedule = solve_debt_schedules(
+        [[p["cash_flow_before_interest"] for p in projections]],
+        senior_debt=senior_initial,
+        sub_debt=sub_initial,
+        senior_rate=a["sofr"] + a["senior_spread"],
+        sub_rate=a["sofr"] + a["sub_spread"],
+        senior_amortization=senior_initial * a["senior_amortization"],
+        min_cash=a["min_cash"],
+        sweep_pct=a["sweep_pct"],
+        revolver_limit=a["revolver_limit"],
+        revolver_rate=a["sofr"] + a["revolver_spread"],
+        sub_pik=bool(a["sub_pik"]),
+    )
+    schedule_fields = [
+        "senior_interest", "sub_interest", "revolver_interest",
+        "mandatory_amortization", "senior_prepayment", "sub_prepayment",
+        "revolver_draw", "revolver_repayment",
+    ]
+    for i, projection in enumerate(projections):
+        for field in schedule_fields:
+            projection[field] = float(schedule[field][0, i])
+        projection["senior_debt"] = float(schedule["senior"][0, i])
+        projection["sub_debt"] = float(schedule["sub"][0, i])
+        projection["revolver"] = float(schedule["revolver"][0, i])
+        projection["cash"] = float(schedule["cash"][0, i])
+        # Year-end balance: the unfunded amount by which cash is below min_cash, carried forward
+        projection["cash_shortfall"] = float(schedule["cash_shortfall"][0, i])
+
+    final = projections[-1]
+    exit_ev = final["ebitda"] * a["exit_multiple"]
+    exit_net_debt = final["senior_debt"] + final["sub_debt"] + final["revolver"] - final["cash"]
+    exit_equity = exit_ev - exit_net_debt
+    moic = exit_equity / equity_invested if equity_invested > 0 else None
+    irr = None
+    if moic is not None:
+        irr = moic ** (1 / a["projection_years"]) - 1 if moic > 0 else -1.0
+
+    diagnostics = schedule["diagnostics"]
+    return {
+        "sources_and_uses": {
+            "entry_ebitda": entry_ebitda,
+            "entry_enterprise_value": entry_ev,
+            "senior_debt": senior_initial,
+            "sub_debt": sub_initial,
+            "minimum_cash": a["min_cash"],
+            "sponsor_equity": equity_invested,
+        },
+        "projections": projections,
+        "returns": {
+            "exit_enterprise_value": exit_ev,
+            "exit_net_debt": exit_net_debt,
+            "exit_equity_value": exit_equity,
+            "moic": moic,
+            "irr": irr,
+        },
+        "diagnostics": {
+            "converged": bool(diagnostics["converged"][0]),
+            "iterations": diagnostics["iterations"][0].tolist(),
+            "max_residual": float(diagnostics["residual"][0].max()),
+        },
+    }
+
+class ScenarioCache:
+    """Thread-safe LRU cache of computed scenarios with a bounded number of entries."""
+
+    def __init__(self, maxsize=SCENARIO_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+def run_scenario(company_name, overrides, cache=None, db_path=DB_PATH):
+    """
+    Compute an LBO scenario for a company, memoized by data and assumptions.
+
+    The cache key is (company, data fingerprint, assumptions hash), so a
+    scenario is recomputed only when the company's metrics or the
+    assumptions change.
+
+    Parameters:
+    company_name (str): Company in financial_metrics
+    overrides (dict): Assumption overrides, see DEFAULT_ASSUMPTIONS
+    cache (ScenarioCache): Optional cache to memoize results in
+
+    Returns:
+    tuple: (result dict, True if the result came from the cache)
+
+    Raises:
+    ValueError: If the assumptions are invalid or the data cannot support a model
+    LookupError: If the company has no rows in financial_metrics
+    """
+    assumptions = parse_assumptions(overrides)
+    rows = load_company_metrics(company_name, db_path)
+    if not rows:
+        raise LookupError(f"No financial data for {company_name}")
+
+    key = (company_name, data_fingerprint(rows), assumptions_hash(assumptions))
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, True
+
+    base_case = build_base_case(rows)
+    result = {
+        "company": company_name,
+        "assumptions": assumptions,
+        "base_case": base_case,
+        **compute_lbo(base_case, assumptions),
+    }
+    if cache is not None:
+        cache.put(key, result)
+    return result, False
@@ -4,12 +4,23 @@ import sqlite3
 from pathlib import Path
 import traceback
 import os
+import sys
 import time  # Add import for time
 
+try:
+    from ..document_processing.hedged_requests import create_message, report_hedging
+except ImportError:
+    # Run as a script: make the sibling document_processing directory importable
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "document_processing"))
+    from hedged_requests import create_message, report_hedging
+
 # Anthropic API details
 ANTHROPIC_API_KEY = "sk-ant-REDACTED"
 CLAUDE_SONNET37 = "claude-3-7-sonnet-20250219"  # Updated model identifier
 
+# perform_lbo_analysis returns a message starting with this instead of raising
+ANALYSIS_ERROR_PREFIX = "Error performing LBO analysis"
+
 def get_available_companies():
     """Get a list of all companies in the database."""
     try:
@@ -112,7 +123,8 @@ def perform_lbo_analysis(financial_data_df):
                                          with columns for Company, Year, Quarter, Revenue, EBITDA, etc.
     
     Returns:
-    str: The full LBO analysis from Claude
+    str: The full LBO analysis from Claude, or a message starting with
+    ANALYSIS_ERROR_PREFIX if the analysis failed
     """
     try:
         # Format the DataFrame as a markdown table string
@@ -193,7 +205,9 @@ Present your work systematically, showing all calculations, assumptions, and rea
         
         # Call Claude API
         print("Calling Claude API for LBO analysis...")
-        message = client.messages.create(
+        message = create_message(
+            client,
+            "lbo_analysis",
             model=CLAUDE_SONNET37,
             max_tokens=20000,
             thinking={
@@ -232,9 +246,9 @@ When writing your response, think of yourself as presenting to sophisticated fin
                 
         return full_output
     except Exception as e:
-        print(f"Error performing LBO analysis: {str(e)}")
+        print(f"{ANALYSIS_ERROR_PREFIX}: {str(e)}")
         traceback.print_exc()
-        return f"Error performing LBO analysis: {str(e)}"
+        return f"{ANALYSIS_ERROR_PREFIX}: {str(e)}"
 
 def save_analysis(company_name, analysis_text):
     """
@@ -262,10 +276,13 @@ def save_analysis(company_name, analysis_text):
         else:
             cleaned_analysis = analysis_text
         
-        # Save analysis to file
+        # Save analysis to file, replacing any previous version atomically so the
+        # web server never serves a partially written analysis
         output_file = output_dir / f"{company_name}_lbo_analysis.txt"
-        with open(output_file, 'w') as f:
+        temp_file = output_file.with_suffix('.txt.tmp')
+        with open(temp_file, 'w') as f:
             f.write(cleaned_analysis)
+        os.replace(temp_file, output_file)
         print(f"✓ Analysis saved to: {output_file}")
         return True
     except Exception as e:
@@ -318,6 +335,7 @@ def main():
             print(f"\n✓ Analysis for {company} complete!")
         
         print("\nAll analyses completed successfully!")
+        report_hedging()
         
     except Exception as e:
         print(f"❌ Error in main function: {str(e)}")